@@ -7,13 +7,20 @@ from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import os
 import uuid
+import json
+import time
+import hashlib
+import threading
 import requests
 import subprocess
-import tempfile
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from PIL import Image, ImageDraw, ImageFont
 import replicate
-from whatsapp_generator import WhatsAppMockupGenerator
+from whatsapp_generator import WhatsAppMockupGenerator, VIDEO_CODEC_ARGS
 
 app = Flask(__name__)
 CORS(app)
@@ -21,15 +28,83 @@ CORS(app)
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logger.info(f'Video encoder: {VIDEO_CODEC_ARGS[1]}')
 
 # Configuration
 REPLICATE_API_TOKEN = os.getenv('REPLICATE_API_TOKEN')
 OUTPUT_DIR = 'output'
+SLIDE_DURATION = 3  # seconds each slide is shown
+IMAGE_CACHE_SIZE = 512  # generated images kept in memory
+IMAGE_CACHE_TTL = 86400  # seconds before a cached image is regenerated
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Initialize Replicate
 replicate_client = replicate.Client(api_token=REPLICATE_API_TOKEN) if REPLICATE_API_TOKEN else None
 
+# Shared HTTP session so image downloads reuse keep-alive connections
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10,
+                       max_retries=Retry(total=3, backoff_factor=0.3))
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# Image generation settings
+FLUX_MODEL = "black-forest-labs/flux-schnell"
+FLUX_PARAMS = {
+    "go_fast": True,
+    "megapixels": "1", 
+    "aspect_ratio": "16:9",
+    "output_format": "jpg"
+}
+
+# In-memory LRU of generated images, keyed by prompt + generation settings
+_image_cache = OrderedDict()
+_image_cache_lock = threading.Lock()
+
+def image_cache_key(prompt):
+    """Hash a prompt together with the model settings that produced it"""
+    payload = json.dumps({'model': FLUX_MODEL, 'prompt': prompt, **FLUX_PARAMS}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def get_cached_image(key):
+    """Return cached JPEG bytes for key, or None if missing or expired"""
+    with _image_cache_lock:
+        entry = _image_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, image = entry
+        if expires_at < time.monotonic():
+            del _image_cache[key]
+            return None
+        _image_cache.move_to_end(key)
+        return image
+
+def cache_image(key, image):
+    """Store JPEG bytes, evicting the least recently used entries"""
+    with _image_cache_lock:
+        _image_cache[key] = (time.monotonic() + IMAGE_CACHE_TTL, image)
+        _image_cache.move_to_end(key)
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+
+def create_slide_image(prompt):
+    """Generate one slide image with Replicate and return the JPEG bytes"""
+    key = image_cache_key(prompt)
+    image = get_cached_image(key)
+    if image is not None:
+        logger.info(f'Image cache hit: {prompt}')
+        return image
+    
+    output = replicate_client.run(FLUX_MODEL, input={"prompt": prompt, **FLUX_PARAMS})
+    
+    # Download image into memory, it goes straight to FFmpeg's stdin
+    image_url = output[0] if isinstance(output, list) else output
+    response = SESSION.get(image_url)
+    response.raise_for_status()
+    
+    cache_image(key, response.content)
+    return response.content
+
 @app.route('/')
 def home():
     """API home with documentation"""
@@ -90,63 +165,43 @@ def generate_slideshow():
         session_id = str(uuid.uuid4())[:8]
         logger.info(f'Generating slideshow: {slides}')
         
-        # Generate images
-        with tempfile.TemporaryDirectory() as temp_dir:
-            image_paths = []
-            
+        # Generate all images concurrently, keeping slide order
+        images = [None] * len(slides)
+        with ThreadPoolExecutor(max_workers=len(slides)) as executor:
+            futures = {}
             for i, prompt in enumerate(slides):
                 logger.info(f'Creating image {i+1}: {prompt}')
-                
-                # Generate image with Replicate
-                output = replicate_client.run(
-                    "black-forest-labs/flux-schnell",
-                    input={
-                        "prompt": prompt,
-                        "go_fast": True,
-                        "megapixels": "1", 
-                        "aspect_ratio": "16:9",
-                        "output_format": "jpg"
-                    }
-                )
-                
-                # Download image
-                image_url = output[0] if isinstance(output, list) else output
-                response = requests.get(image_url)
-                response.raise_for_status()
-                
-                image_path = os.path.join(temp_dir, f'slide_{i}.jpg')
-                with open(image_path, 'wb') as f:
-                    f.write(response.content)
-                image_paths.append(image_path)
-            
-            # Create video with FFmpeg
-            output_file = os.path.join(OUTPUT_DIR, f'slideshow_{session_id}.mp4')
-            
-            # Create input list for FFmpeg
-            input_list = os.path.join(temp_dir, 'input.txt')
-            with open(input_list, 'w') as f:
-                for img_path in image_paths:
-                    f.write(f"file '{img_path}'\n")
-                    f.write("duration 3\n")
-                if image_paths:
-                    f.write(f"file '{image_paths[-1]}'\n")  # Last frame
-            
-            # Run FFmpeg
-            cmd = [
-                'ffmpeg', '-y', '-f', 'concat', '-safe', '0', 
-                '-i', input_list,
-                '-vf', 'scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2',
-                '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
-                output_file
-            ]
-            
-            subprocess.run(cmd, check=True, capture_output=True)
+                futures[executor.submit(create_slide_image, prompt)] = i
             
+            for future in as_completed(futures):
+                images[futures[future]] = future.result()
+        
+        # Create video with FFmpeg
+        output_file = os.path.join(OUTPUT_DIR, f'slideshow_{session_id}.mp4')
+        
+        # Pipe the JPEGs into FFmpeg, one input frame per slide. The last one
+        # is sent twice so it keeps a full duration before -t trims the end.
+        cmd = [
+            'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'image2pipe',
+            '-framerate', f'1/{SLIDE_DURATION}',
+            '-i', '-',
+            '-vf', 'scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2',
+            '-r', '30', '-t', str(SLIDE_DURATION * len(images)),
+            *VIDEO_CODEC_ARGS, '-threads', '0', '-pix_fmt', 'yuv420p',
+            output_file
+        ]
+        
+        subprocess.run(cmd, input=b''.join(images + images[-1:]), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        
         logger.info(f'Slideshow created: {output_file}')
-        return send_file(output_file, as_attachment=True)
+        return send_file(output_file, as_attachment=True, max_age=3600)
         
     except Exception as e:
         logger.error(f'Slideshow error: {e}')
+        if getattr(e, 'stderr', None):
+            logger.error(f'FFmpeg output: {e.stderr.decode(errors="replace").strip()}')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/whatsapp', methods=['POST'])  
@@ -175,6 +230,8 @@ def generate_whatsapp():
         
     except Exception as e:
         logger.error(f'WhatsApp error: {e}')
+        if getattr(e, 'stderr', None):
+            logger.error(f'FFmpeg output: {e.stderr.decode(errors="replace").strip()}')
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
@@ -0,0 +1,16 @@
+"""
+Gunicorn settings for the Growth Tools API
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+
+# Threaded workers so slow Replicate calls and FFmpeg encodes overlap across requests
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+
+# Video generation can take minutes
+timeout = 600
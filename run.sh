@@ -14,5 +14,5 @@ pip install -r requirements.txt
 # Set API token
 export REPLICATE_API_TOKEN="your_replicate_api_token_here"
 
-# Run the API
-python app.py
\ No newline at end of file
+# Run the API (use `python app.py` for the Flask dev server)
+gunicorn -c gunicorn_conf.py app:app
\ No newline at end of file
@@ -3,18 +3,155 @@
 Enhanced WhatsApp Mockup Generator with realistic chat flow and sounds
 """
 
+import io
 import os
 import uuid
 import subprocess
 import tempfile
 import logging
+import wave
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 from datetime import datetime
 import math
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+
+def _nvenc_available():
+    """Check whether FFmpeg can actually encode with h264_nvenc. Many builds
+    list the encoder on hosts without an NVIDIA GPU, so try a one-frame encode."""
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', 'color=s=64x64',
+        '-frames:v', '1', '-c:v', 'h264_nvenc', '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+# Detect hardware encoding once at import time, fall back to libx264
+NVENC_AVAILABLE = _nvenc_available()
+
+if NVENC_AVAILABLE:
+    VIDEO_CODEC_ARGS = ['-c:v', 'h264_nvenc', '-preset', 'p1', '-tune', 'll',
+                        '-rc', 'vbr', '-b:v', '4M']
+else:
+    # Fastest x264 settings, the quality loss is fine for mockups
+    VIDEO_CODEC_ARGS = ['-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency',
+                        '-crf', '28']
+
+SAMPLE_RATE = 44100
+
+
+def _beep_samples(frequency, duration, sample_rate=SAMPLE_RATE):
+    """Generate a simple beep sound as 16-bit PCM samples"""
+    t = np.linspace(0, duration, int(sample_rate * duration), False)
+    # Generate sine wave
+    tone = np.sin(frequency * 2 * np.pi * t)
+    # Add envelope to avoid clicks
+    envelope = np.exp(-t * 10)  # Exponential decay
+    tone = tone * envelope
+    # Convert to 16-bit integers
+    return (tone * 32767).astype(np.int16)
+
+
+def _wav_bytes(samples, sample_rate=SAMPLE_RATE):
+    """Encode mono 16-bit PCM samples as a WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)  # Mono
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+# Sound effects are deterministic, so render them once at import time
+SEND_SOUND = _beep_samples(frequency=800, duration=0.1)  # Higher pitch
+RECEIVE_SOUND = _beep_samples(frequency=600, duration=0.15)  # Lower pitch
+
+
+@lru_cache(maxsize=None)
+def _load_font(size):
+    """Load the chat font at a given size, shared by every generator so the
+    text caches below stay warm across requests"""
+    try:
+        return ImageFont.truetype('/System/Library/Fonts/Arial.ttf', size)
+    except (OSError, ImportError):
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=4096)
+def _glyph(font, char):
+    """Rasterize a single character once, returning its mask, offset and advance"""
+    left, top, right, bottom = font.getbbox(char)
+    mask = Image.new('L', (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), char, font=font, fill=255)
+    return mask, (left, top), font.getlength(char)
+
+
+def _draw_string(draw, xy, text, font, fill):
+    """Draw text by compositing cached glyph masks, skipping FreeType layout.
+    This drops kerning and shaping, so it is only meant for timestamp and
+    status strings (digits, ':' and '✓'); message text goes through draw.text."""
+    x, y = xy
+    for char in text:
+        mask, (left, top), advance = _glyph(font, char)
+        draw.bitmap((round(x + left), y + top), mask, fill=fill)
+        x += advance
+
+
+@lru_cache(maxsize=256)
+def _ellipse_mask(width, height):
+    """Pre-rasterized ellipse, stamped with ImageDraw.bitmap in any fill color"""
+    mask = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, width - 1, height - 1], fill=255)
+    return mask
+
+
+@lru_cache(maxsize=256)
+def _rounded_mask(width, height, radius):
+    """Pre-rasterized rounded rectangle, stamped like _ellipse_mask"""
+    mask = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(mask).rounded_rectangle([0, 0, width - 1, height - 1], radius=radius, fill=255)
+    return mask
+
+
+@lru_cache(maxsize=2048)
+def _text_width(font, text):
+    """Measure the rendered width of a line of text"""
+    bbox = font.getbbox(text)
+    return bbox[2] - bbox[0]
+
+
+@lru_cache(maxsize=2048)
+def _wrap_lines(text, font, max_width):
+    """Greedy word wrap, memoized since every frame reuses the same texts"""
+    words = text.split()
+    lines = []
+    current_line = []
+    
+    for word in words:
+        test_line = ' '.join(current_line + [word])
+        if _text_width(font, test_line) <= max_width:
+            current_line.append(word)
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+            current_line = [word]
+    
+    if current_line:
+        lines.append(' '.join(current_line))
+    
+    return tuple(lines)
+
+
 class WhatsAppMockupGenerator:
     def __init__(self, messages, bot_name="Bot"):
         self.messages = messages
@@ -35,82 +172,54 @@ class WhatsAppMockupGenerator:
         self.time_color = (168, 168, 168)
         
         # Timing
+        self.intro_duration = 0.5  # seconds of empty chat before the first message
         self.typing_duration = 2.0  # seconds of typing indicator
         self.message_display_duration = 3.0  # seconds to show message
         self.pause_between_messages = 0.5  # pause between messages
+        self.typing_cycle_frames = 10  # frames per typing dot pulse
         
-        # Load fonts
-        try:
-            self.header_font = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 18)
-            self.message_font = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 16)
-            self.time_font = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 12)
-        except:
-            self.header_font = ImageFont.load_default()
-            self.message_font = ImageFont.load_default()
-            self.time_font = ImageFont.load_default()
-    
-    def create_sound_effects(self, temp_dir):
-        """Generate WhatsApp-style sound effects"""
+        # Bubble layout
+        self.max_bubble_width = 260
+        self.bubble_padding = 12
+        self.line_height = 22
         
-        # Generate send sound (higher pitch beep)
-        send_sound_path = os.path.join(temp_dir, 'send.wav')
-        self._generate_beep(send_sound_path, frequency=800, duration=0.1)
-        
-        # Generate receive sound (lower pitch beep)
-        receive_sound_path = os.path.join(temp_dir, 'receive.wav')
-        self._generate_beep(receive_sound_path, frequency=600, duration=0.15)
+        # Load fonts
+        self.header_font = _load_font(18)
+        self.message_font = _load_font(16)
+        self.time_font = _load_font(12)
         
-        return send_sound_path, receive_sound_path
-    
-    def _generate_beep(self, output_path, frequency=800, duration=0.1, sample_rate=44100):
-        """Generate a simple beep sound"""
-        t = np.linspace(0, duration, int(sample_rate * duration), False)
-        # Generate sine wave
-        wave = np.sin(frequency * 2 * np.pi * t)
-        # Add envelope to avoid clicks
-        envelope = np.exp(-t * 10)  # Exponential decay
-        wave = wave * envelope
-        # Convert to 16-bit integers
-        wave = (wave * 32767).astype(np.int16)
-        
-        # Write WAV file manually (simple format)
-        with open(output_path, 'wb') as f:
-            # WAV header
-            f.write(b'RIFF')
-            f.write((36 + len(wave) * 2).to_bytes(4, 'little'))
-            f.write(b'WAVE')
-            f.write(b'fmt ')
-            f.write((16).to_bytes(4, 'little'))
-            f.write((1).to_bytes(2, 'little'))  # PCM
-            f.write((1).to_bytes(2, 'little'))  # Mono
-            f.write(sample_rate.to_bytes(4, 'little'))
-            f.write((sample_rate * 2).to_bytes(4, 'little'))
-            f.write((2).to_bytes(2, 'little'))
-            f.write((16).to_bytes(2, 'little'))
-            f.write(b'data')
-            f.write((len(wave) * 2).to_bytes(4, 'little'))
-            f.write(wave.tobytes())
+        # The mockup only lasts seconds, so one clock reading serves the
+        # status bar and every message timestamp
+        self.timestamp = datetime.now().strftime("%H:%M")
     
     def wrap_text(self, text, max_width, font):
         """Wrap text to fit in bubble"""
-        words = text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            bbox = font.getbbox(test_line)
-            if bbox[2] - bbox[0] <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
+        return list(_wrap_lines(text, font, max_width))
+    
+    def layout_message(self, text, show_time=True):
+        """Compute wrapped lines and bubble dimensions for a message"""
+        padding = self.bubble_padding
+        
+        # Wrap text
+        lines = self.wrap_text(text, self.max_bubble_width - (padding * 2), self.message_font)
         
-        if current_line:
-            lines.append(' '.join(current_line))
+        # Calculate bubble dimensions
+        bubble_height = len(lines) * self.line_height + (padding * 2) + 5
+        if show_time:
+            bubble_height += 18  # Extra space for timestamp
         
-        return lines
+        # Calculate bubble width based on longest line
+        max_line_width = max((_text_width(self.message_font, line) for line in lines), default=0)
+        
+        # Ensure minimum width for timestamp
+        time_width = 50 if show_time else 0
+        bubble_width = max(min(self.max_bubble_width, max_line_width + (padding * 2)), time_width + 20)
+        
+        return {
+            'lines': lines,
+            'bubble_width': bubble_width,
+            'bubble_height': bubble_height
+        }
     
     def draw_header(self, draw):
         """Draw WhatsApp header"""
@@ -121,8 +230,7 @@ class WhatsAppMockupGenerator:
         draw.rectangle([0, 0, self.width, 44], fill=(0, 0, 0))
         
         # Status bar items
-        current_time = datetime.now().strftime("%H:%M")
-        draw.text((15, 12), current_time, font=self.time_font, fill=self.text_color)
+        _draw_string(draw, (15, 12), self.timestamp, self.time_font, self.text_color)
         
         # Signal and battery icons (simplified)
         draw.text((self.width - 60, 12), "●●●", font=self.time_font, fill=self.text_color)
@@ -134,8 +242,8 @@ class WhatsAppMockupGenerator:
         # Profile circle (bot)
         circle_x, circle_y = 50, 70
         circle_radius = 18
-        draw.ellipse([circle_x - circle_radius, circle_y - circle_radius,
-                     circle_x + circle_radius, circle_y + circle_radius],
+        draw.bitmap((circle_x - circle_radius, circle_y - circle_radius),
+                    _ellipse_mask(circle_radius * 2 + 1, circle_radius * 2 + 1),
                     fill=(150, 150, 150))
         
         # Bot name
@@ -147,16 +255,15 @@ class WhatsAppMockupGenerator:
         # Menu dots
         draw.text((self.width - 35, 65), "⋮", font=self.header_font, fill=self.text_color)
     
-    def draw_typing_indicator(self, draw, y_pos, frame_num=0):
-        """Draw typing indicator animation"""
-        # Typing bubble
+    def draw_typing_bubble(self, draw, y_pos):
+        """Draw the empty typing indicator bubble"""
         bubble_x = 20
         bubble_width = 60
         bubble_height = 40
         
         # Bubble background
-        draw.rounded_rectangle([bubble_x, y_pos, bubble_x + bubble_width, y_pos + bubble_height],
-                             radius=15, fill=self.bot_bubble_color)
+        draw.bitmap((bubble_x, y_pos), _rounded_mask(bubble_width + 1, bubble_height + 1, 15),
+                    fill=self.bot_bubble_color)
         
         # Add bubble tail for WhatsApp look
         tail_points = [
@@ -165,43 +272,66 @@ class WhatsAppMockupGenerator:
             (bubble_x + 5, y_pos + bubble_height - 5)
         ]
         draw.polygon(tail_points, fill=self.bot_bubble_color)
-        
+    
+    def typing_dots(self, y_pos, frame_num=0):
+        """Centers and colors of the three typing dots for one animation frame"""
         # Animated dots (proper animation)
-        dot_x = bubble_x + 18
+        dot_x = 20 + 18
         dot_y = y_pos + 20
+        dots = []
         
         for i in range(3):
             x = dot_x + (i * 12)
-            # Animate dots with proper timing
-            time_offset = (frame_num + i * 10) * 0.3
-            opacity = int(100 + 100 * abs(math.sin(time_offset)))
-            dot_color = (opacity, opacity, opacity)
-            draw.ellipse([x-3, dot_y-3, x+3, dot_y+3], fill=dot_color)
+            # Each dot pulses a third of a cycle after the previous one; the
+            # animation repeats exactly every typing_cycle_frames frames
+            phase = (frame_num + i * self.typing_cycle_frames / 3) / self.typing_cycle_frames
+            opacity = int(100 + 100 * abs(math.sin(phase * math.pi)))
+            dots.append((x, dot_y, (opacity, opacity, opacity)))
+        
+        return dots
+    
+    def draw_typing_dots(self, draw, y_pos, frame_num=0):
+        """Draw the typing dots for one animation frame"""
+        for x, y, dot_color in self.typing_dots(y_pos, frame_num):
+            draw.bitmap((x - 3, y - 3), _ellipse_mask(7, 7), fill=dot_color)
+    
+    def typing_frame_bytes(self, base, base_bytes, y_pos, frame_num=0):
+        """Raw RGB bytes of one typing frame. base is the frame with an empty
+        typing bubble and base_bytes its tobytes(); the dot patches are
+        written straight into a copy of those bytes instead of going through PIL"""
+        dots = self.typing_dots(y_pos, frame_num)
+        if any(y - 3 < 0 or y + 3 >= self.height for _, y, _ in dots):
+            # Dots run off screen, let PIL clip them
+            frame = base.copy()
+            self.draw_typing_dots(ImageDraw.Draw(frame), y_pos, frame_num)
+            return frame.tobytes()
+        
+        buf = bytearray(base_bytes)
+        stride = self.width * 3
+        row_bytes = 7 * 3
+        
+        for x, y, dot_color in dots:
+            left, top = x - 3, y - 3
+            patch = base.crop((left, top, left + 7, top + 7))
+            ImageDraw.Draw(patch).bitmap((0, 0), _ellipse_mask(7, 7), fill=dot_color)
+            patch_bytes = patch.tobytes()
+            
+            for row in range(7):
+                offset = (top + row) * stride + left * 3
+                buf[offset:offset + row_bytes] = patch_bytes[row * row_bytes:(row + 1) * row_bytes]
+        
+        return buf
     
     def draw_message_bubble(self, draw, text, is_user, y_pos, show_time=True, message_time=None):
         """Draw a message bubble with text and proper WhatsApp styling"""
-        max_bubble_width = 260
-        padding = 12
-        
-        # Wrap text
-        lines = self.wrap_text(text, max_bubble_width - (padding * 2), self.message_font)
-        
-        # Calculate bubble dimensions
-        line_height = 22
-        bubble_height = len(lines) * line_height + (padding * 2) + 5
-        if show_time:
-            bubble_height += 18  # Extra space for timestamp
+        padding = self.bubble_padding
+        line_height = self.line_height
         
-        # Calculate bubble width based on longest line
-        max_line_width = 0
-        for line in lines:
-            bbox = self.message_font.getbbox(line)
-            line_width = bbox[2] - bbox[0]
-            max_line_width = max(max_line_width, line_width)
-        
-        # Ensure minimum width for timestamp
-        time_width = 50 if show_time else 0
-        bubble_width = max(min(max_bubble_width, max_line_width + (padding * 2)), time_width + 20)
+        # Wrapping and text measurement are memoized in _wrap_lines and _text_width
+        layout = self.layout_message(text, show_time)
+        lines = layout['lines']
+        bubble_width = layout['bubble_width']
+        bubble_height = layout['bubble_height']
         
         # Position bubble with proper spacing
         margin = 15
@@ -213,8 +343,8 @@ class WhatsAppMockupGenerator:
             bubble_color = self.bot_bubble_color
         
         # Draw bubble with rounded corners
-        draw.rounded_rectangle([bubble_x, y_pos, bubble_x + bubble_width, y_pos + bubble_height],
-                             radius=18, fill=bubble_color)
+        draw.bitmap((bubble_x, y_pos), _rounded_mask(bubble_width + 1, bubble_height + 1, 18),
+                    fill=bubble_color)
         
         # Add WhatsApp-style tail
         if is_user:
@@ -243,8 +373,8 @@ class WhatsAppMockupGenerator:
         
         # Draw timestamp and status
         if show_time:
-            timestamp = message_time or datetime.now().strftime("%H:%M")
-            time_bbox = self.time_font.getbbox(timestamp)
+            timestamp = message_time or self.timestamp
+            time_width = _text_width(self.time_font, timestamp)
             
             if is_user:
                 # Add read status for user messages
@@ -252,219 +382,191 @@ class WhatsAppMockupGenerator:
                 time_x = bubble_x + bubble_width - len(status_text) * 6 - 8
             else:
                 status_text = timestamp
-                time_x = bubble_x + bubble_width - (time_bbox[2] - time_bbox[0]) - 8
+                time_x = bubble_x + bubble_width - time_width - 8
             
             time_y = y_pos + bubble_height - 16
-            draw.text((time_x, time_y), status_text, font=self.time_font, fill=self.time_color)
+            _draw_string(draw, (time_x, time_y), status_text, self.time_font, self.time_color)
         
         return bubble_height
     
-    def generate_frames(self, temp_dir):
-        """Generate all video frames with proper message flow"""
-        frames = []
-        messages_shown = []
-        
-        # Start with empty chat for a moment
-        initial_frames = int(0.5 * self.fps)  # 0.5 seconds
-        for frame in range(initial_frames):
-            img = Image.new('RGB', (self.width, self.height), self.bg_color)
-            draw = ImageDraw.Draw(img)
-            self.draw_header(draw)
-            
-            frame_path = os.path.join(temp_dir, f'frame_{len(frames):06d}.png')
-            img.save(frame_path)
-            frames.append(frame_path)
+    def timeline(self):
+        """Lay the video out as (phase, msg_idx, frame_count) segments in
+        playback order. Every frame is a pure function of its segment, and
+        the frame renderer, pause filters and audio track all share this plan."""
+        segments = [('intro', None, int(self.intro_duration * self.fps))]
         
         for msg_idx, message in enumerate(self.messages):
-            text = message.get('text', '')
-            is_user = message.get('role', 'user') == 'user'
+            # Typing indicator only precedes bot messages
+            if message.get('role', 'user') != 'user':
+                segments.append(('typing', msg_idx, int(self.typing_duration * self.fps)))
             
-            # Phase 1: Show typing indicator (only for bot messages)
-            if not is_user:
-                typing_frames = int(self.typing_duration * self.fps)
-                for frame in range(typing_frames):
-                    img = Image.new('RGB', (self.width, self.height), self.bg_color)
-                    draw = ImageDraw.Draw(img)
-                    
-                    # Draw header
-                    self.draw_header(draw)
-                    
-                    # Draw previous messages
-                    draw_y = 125  # Start below header with padding
-                    for prev_msg in messages_shown:
-                        bubble_height = self.draw_message_bubble(
-                            draw, prev_msg['text'], prev_msg['is_user'], draw_y,
-                            message_time=prev_msg.get('time', '12:00')
-                        )
-                        draw_y += bubble_height + 8  # Smaller gap between messages
-                    
-                    # Draw typing indicator with animation
-                    self.draw_typing_indicator(draw, draw_y, frame)
-                    
-                    frame_path = os.path.join(temp_dir, f'frame_{len(frames):06d}.png')
-                    img.save(frame_path)
-                    frames.append(frame_path)
+            segments.append(('message', msg_idx, int(self.message_display_duration * self.fps)))
             
-            # Phase 2: Show the actual message appearing
-            message_frames = int(self.message_display_duration * self.fps)
-            current_time = datetime.now().strftime("%H:%M")
+            if msg_idx < len(self.messages) - 1:
+                segments.append(('pause', msg_idx, int(self.pause_between_messages * self.fps)))
+        
+        return segments
+    
+    def pause_filters(self):
+        """Build FFmpeg loop filters that hold the last frame of each message
+        for the pause, so those frames never have to be rendered or piped"""
+        filters = []
+        frame_count = 0
+        
+        for phase, msg_idx, frames in self.timeline():
+            if phase == 'pause' and frames > 0:
+                # Earlier loops already expanded the stream, so the index is
+                # the frame's position in the final timeline
+                filters.append(f'loop=loop={frames}:size=1:start={frame_count - 1}')
+            frame_count += frames
+        
+        return filters
+    
+    def generate_frames(self, output_path, audio_path):
+        """Render all video frames and pipe them as raw RGB into FFmpeg,
+        which encodes them and muxes in the audio track in a single pass"""
+        cmd = [
+            'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pixel_format', 'rgb24',
+            '-video_size', f'{self.width}x{self.height}',
+            '-framerate', str(self.fps),
+            '-i', '-',
+            '-i', audio_path,
+            '-map', '0:v', '-map', '1:a'
+        ]
+        filters = self.pause_filters()
+        if filters:
+            cmd.extend(['-vf', ','.join(filters)])
+        cmd.extend([
+            *VIDEO_CODEC_ARGS, '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-shortest',
+            output_path
+        ])
+        
+        # Only errors reach stderr, so the pipe never fills up while we write frames
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            self.write_frames(proc.stdin)
+        except BrokenPipeError:
+            # FFmpeg exited early, generate_video reports its error output
+            pass
+        except BaseException:
+            # Rendering failed, don't leave the encoder running
+            proc.kill()
+            proc.wait()
+            raise
+        
+        return proc
+    
+    def write_frames(self, stream):
+        """Render the timeline and write each frame as raw RGB bytes to stream"""
+        # Static layer: header plus every message shown so far. Each bubble is
+        # drawn onto it once, when its message appears, instead of every frame.
+        static_bg = Image.new('RGB', (self.width, self.height), self.bg_color)
+        static_draw = ImageDraw.Draw(static_bg)
+        self.draw_header(static_draw)
+        draw_y = 125  # Start below header with padding
+        
+        # Reusable buffer for frames drawn on top of the static layer
+        frame_buf = Image.new('RGB', (self.width, self.height), self.bg_color)
+        frame_draw = ImageDraw.Draw(frame_buf)
+        
+        for phase, msg_idx, frames in self.timeline():
+            if phase == 'intro':
+                # Start with empty chat for a moment
+                frame_bytes = static_bg.tobytes()
+                for frame in range(frames):
+                    stream.write(frame_bytes)
             
-            for frame in range(message_frames):
-                img = Image.new('RGB', (self.width, self.height), self.bg_color)
-                draw = ImageDraw.Draw(img)
+            elif phase == 'typing':
+                # The animation is periodic, so render one cycle and repeat it.
+                # The bubble is drawn once; each variant only splats the dots
+                # into a copy of its raw bytes.
+                frame_buf.paste(static_bg)
+                self.draw_typing_bubble(frame_draw, draw_y)
+                base_bytes = frame_buf.tobytes()
                 
-                # Draw header
-                self.draw_header(draw)
+                typing_variants = [
+                    self.typing_frame_bytes(frame_buf, base_bytes, draw_y, frame)
+                    for frame in range(min(self.typing_cycle_frames, frames))
+                ]
                 
-                # Draw all previous messages
-                draw_y = 125
-                for prev_msg in messages_shown:
-                    bubble_height = self.draw_message_bubble(
-                        draw, prev_msg['text'], prev_msg['is_user'], draw_y,
-                        message_time=prev_msg.get('time', '12:00')
-                    )
-                    draw_y += bubble_height + 8
+                for frame in range(frames):
+                    stream.write(typing_variants[frame % len(typing_variants)])
+            
+            elif phase == 'message':
+                # Show the actual message appearing. Its bubble joins the
+                # static layer, so every frame until the next message is identical.
+                message = self.messages[msg_idx]
+                text = message.get('text', '')
+                is_user = message.get('role', 'user') == 'user'
                 
-                # Draw current message
                 bubble_height = self.draw_message_bubble(
-                    draw, text, is_user, draw_y, message_time=current_time
+                    static_draw, text, is_user, draw_y, message_time=self.timestamp
                 )
+                draw_y += bubble_height + 8  # Smaller gap between messages
                 
-                frame_path = os.path.join(temp_dir, f'frame_{len(frames):06d}.png')
-                img.save(frame_path)
-                frames.append(frame_path)
+                frame_bytes = static_bg.tobytes()
+                for frame in range(frames):
+                    stream.write(frame_bytes)
             
-            # Add message to shown messages with timestamp
-            messages_shown.append({
-                'text': text, 
-                'is_user': is_user,
-                'time': current_time
-            })
-            
-            # Phase 3: Brief pause between messages
-            if msg_idx < len(self.messages) - 1:
-                pause_frames = int(self.pause_between_messages * self.fps)
-                for frame in range(pause_frames):
-                    # Keep showing the current state
-                    img = Image.new('RGB', (self.width, self.height), self.bg_color)
-                    draw = ImageDraw.Draw(img)
-                    self.draw_header(draw)
-                    
-                    draw_y = 125
-                    for prev_msg in messages_shown:
-                        bubble_height = self.draw_message_bubble(
-                            draw, prev_msg['text'], prev_msg['is_user'], draw_y,
-                            message_time=prev_msg.get('time', '12:00')
-                        )
-                        draw_y += bubble_height + 8
-                    
-                    frame_path = os.path.join(temp_dir, f'frame_{len(frames):06d}.png')
-                    img.save(frame_path)
-                    frames.append(frame_path)
-        
-        return frames
+            # Pause segments write nothing: FFmpeg repeats the last frame
+            # itself via pause_filters()
     
     def generate_video(self, output_path):
         """Generate the complete WhatsApp mockup video with sound"""
         with tempfile.TemporaryDirectory() as temp_dir:
             logger.info(f"Generating WhatsApp mockup with {len(self.messages)} messages")
             
-            # Generate sound effects
-            send_sound_path, receive_sound_path = self.create_sound_effects(temp_dir)
-            
-            # Generate video frames
-            frames = self.generate_frames(temp_dir)
-            
-            # Create video from frames
-            frame_pattern = os.path.join(temp_dir, 'frame_%06d.png')
-            video_only_path = os.path.join(temp_dir, 'video_only.mp4')
-            
-            # Create video
-            cmd = [
-                'ffmpeg', '-y', '-framerate', str(self.fps),
-                '-i', frame_pattern,
-                '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
-                video_only_path
-            ]
-            
-            subprocess.run(cmd, check=True, capture_output=True)
-            
             # Create audio track with sound effects
-            audio_path = self.create_audio_track(temp_dir, send_sound_path, receive_sound_path)
-            
-            # Combine video and audio
-            cmd = [
-                'ffmpeg', '-y',
-                '-i', video_only_path,
-                '-i', audio_path,
-                '-c:v', 'copy', '-c:a', 'aac',
-                '-shortest',
-                output_path
-            ]
+            audio_path = self.create_audio_track(temp_dir)
             
-            subprocess.run(cmd, check=True, capture_output=True)
+            try:
+                # Render frames straight into the encoder, which also muxes the audio
+                proc = self.generate_frames(output_path, audio_path)
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+                stderr = proc.stderr.read()
+                if proc.wait() != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, proc.args, stderr=stderr)
+            except BaseException:
+                # Never leave a truncated video behind in the output directory
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                raise
             
         logger.info(f"WhatsApp mockup video created: {output_path}")
         return output_path
     
-    def create_audio_track(self, temp_dir, send_sound_path, receive_sound_path):
+    def create_audio_track(self, temp_dir):
         """Create audio track with sound effects at appropriate times"""
-        # Calculate timing for each message
+        # Time each sound from the same frame plan as the video
         audio_segments = []
-        current_time = 0
+        frame_count = 0
         
-        for message in self.messages:
-            is_user = message.get('role', 'user') == 'user'
-            
-            # Add typing delay for bot messages
-            if not is_user:
-                current_time += self.typing_duration
-            
+        for phase, msg_idx, frames in self.timeline():
             # Add sound effect at message appearance
-            if is_user:
-                sound_file = send_sound_path
-            else:
-                sound_file = receive_sound_path
-            
-            audio_segments.append((current_time, sound_file))
-            current_time += self.message_display_duration + self.pause_between_messages
+            if phase == 'message':
+                is_user = self.messages[msg_idx].get('role', 'user') == 'user'
+                sound = SEND_SOUND if is_user else RECEIVE_SOUND
+                audio_segments.append((frame_count / self.fps, sound))
+            frame_count += frames
         
-        # Create silent audio track and overlay sounds
-        total_duration = current_time + 1  # Add 1 second buffer
-        silent_audio_path = os.path.join(temp_dir, 'silent.wav')
-        
-        # Create silent audio
-        cmd = [
-            'ffmpeg', '-y', '-f', 'lavfi',
-            '-i', f'anullsrc=duration={total_duration}:sample_rate=44100',
-            silent_audio_path
-        ]
-        subprocess.run(cmd, check=True, capture_output=True)
-        
-        # Overlay sound effects
-        audio_output_path = os.path.join(temp_dir, 'final_audio.wav')
-        filter_complex = f"[0:a]"
+        # Mix the sound effects over silence directly in PCM
+        total_duration = frame_count / self.fps + 1  # Add 1 second buffer
+        track = np.zeros(int(total_duration * SAMPLE_RATE), dtype=np.int32)
         
-        # Add each sound effect
-        for i, (time_offset, sound_file) in enumerate(audio_segments):
-            filter_complex += f"[{i+1}:a]adelay={int(time_offset*1000)}|{int(time_offset*1000)}[delayed{i}]; "
-            filter_complex += f"[delayed{i}]"
+        for time_offset, sound in audio_segments:
+            start = int(time_offset * SAMPLE_RATE)
+            segment = track[start:start + len(sound)]
+            segment += sound[:len(segment)]
         
-        filter_complex += "amix=inputs=" + str(len(audio_segments) + 1) + "[out]"
+        track = np.clip(track, -32768, 32767).astype(np.int16)
         
-        cmd = ['ffmpeg', '-y', '-i', silent_audio_path]
-        for _, sound_file in audio_segments:
-            cmd.extend(['-i', sound_file])
-        
-        cmd.extend([
-            '-filter_complex', filter_complex,
-            '-map', '[out]',
-            audio_output_path
-        ])
-        
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-            return audio_output_path
-        except:
-            # Fallback to silent audio if sound mixing fails
-            return silent_audio_path
\ No newline at end of file
+        audio_output_path = os.path.join(temp_dir, 'final_audio.wav')
+        with open(audio_output_path, 'wb') as f:
+            f.write(_wav_bytes(track))
+        return audio_output_path